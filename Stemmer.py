@@ -25,33 +25,63 @@
 
 See http://snowball.tartarus.org/algorithms/english/stemmer.html"""
 import unittest, re
+from collections import OrderedDict
+
+try:
+    unicode
+except NameError:
+    # python 3
+    unicode = str
+
+non_ascii_regexp = re.compile(u'[^\x00-\x7f]')
+def is_ascii(word):
+    return not non_ascii_regexp.search(word)
+if hasattr(unicode, 'isascii'):
+    # python 3.7+ tracks whether a string is ascii, so this is O(1)
+    is_ascii = unicode.isascii
+
+vowels = frozenset('aeiouy')
+vowels_wxy = frozenset('aeiouywxY')
+
+def find_region(word, start):
+    # the region begins after the first non-vowel following a vowel
+    n = len(word)
+    i = start
+    while i < n and word[i] not in vowels:
+        i += 1
+    while i < n and word[i] in vowels:
+        i += 1
+    if i < n:
+        return i + 1
+    return n
 
-regexp = re.compile(r"[^aeiouy]*[aeiouy]+[^aeiouy](\w*)")
 def get_r1(word):
-    # exceptional forms
-    if word.startswith('gener') or word.startswith('arsen'):
+    # exceptional forms, tested together since most words are not one
+    if word.startswith(('gener', 'arsen', 'commun')):
+        if word.startswith('commun'):
+            return 6
         return 5
-    if word.startswith('commun'):
-        return 6
 
     # normal form
-    match = regexp.match(word)
-    if match:
-        return match.start(1)
-    return len(word)
+    return find_region(word, 0)
 
 def get_r2(word):
-    match = regexp.match(word, get_r1(word))
-    if match:
-        return match.start(1)
-    return len(word)
-
-def ends_with_short_syllable(word):
-    if len(word) == 2:
-        if re.match(r"^[aeiouy][^aeiouy]$", word):
+    return get_r1_r2(word)[1]
+
+def get_r1_r2(word):
+    r1 = get_r1(word)
+    return r1, find_region(word, r1)
+
+def ends_with_short_syllable(word, n=None):
+    # tests the first n characters of word, so callers need not slice
+    if n is None:
+        n = len(word)
+    if n == 2:
+        if word[0] in vowels and word[1] not in vowels:
+            return True
+    elif n > 2:
+        if word[n - 3] not in vowels and word[n - 2] in vowels and word[n - 1] not in vowels_wxy:
             return True
-    if re.match(r".*[^aeiouy][aeiouy][^aeiouywxY]$", word):
-        return True
     return False
 
 def is_short_word(word):
@@ -66,177 +96,229 @@ def remove_initial_apostrophe(word):
     return word
 
 def capitalize_consonant_ys(word):
-    if word.startswith('y'):
-        word = 'Y' + word[1:]
-    return re.sub(r"([aeiouy])y", '\g<1>Y', word)
+    # a y is a consonant at the start of the word or after a vowel; the
+    # previous character is checked after it has itself been marked
+    i = word.find('y')
+    while i != -1:
+        if i == 0 or word[i - 1] in vowels:
+            word = word[:i] + 'Y' + word[i + 1:]
+        i = word.find('y', i + 1)
+    return word
 
 def step_0(word):
-    if word.endswith("'s'"):
-        return word[:-3]
-    if word.endswith("'s"):
-        return word[:-2]
-    if word.endswith("'"):
+    last = word[-1:]
+    if last == "'":
+        if word[-3:] == "'s'":
+            return word[:-3]
         return word[:-1]
+    if last == 's' and word[-2:] == "'s":
+        return word[:-2]
     return word
 
 def step_1a(word):
-    if word.endswith('sses'):
-        return word[:-4] + 'ss'
-    if word.endswith('ied') or word.endswith('ies'):
+    # every suffix handled here ends in s or d, so look at the tail once
+    last = word[-1:]
+    if last != 's' and last != 'd':
+        return word
+    tail = word[-4:]
+    if tail[-3:] == 'ies' or tail[-3:] == 'ied':
+        # ies/ied become i, or ie if only one letter precedes them
         if len(word) > 4:
-            return word[:-3] + 'i'
-        else:
-            return word[:-3] + 'ie'
-    if word.endswith('us') or word.endswith('ss'):
+            return word[:-2]
+        return word[:-1]
+    if last == 'd':
         return word
-    if word.endswith('s'):
-        preceding = word[:-1]
-        if re.search(r"[aeiouy].", preceding):
-            return preceding
+    if tail == 'sses':
+        return word[:-2]
+    if tail[-2:] == 'us' or tail[-2:] == 'ss':
         return word
+    # delete the s if there is a vowel before the letter preceding it
+    if not vowels.isdisjoint(word[:-2]):
+        return word[:-1]
     return word
 
-def step_1b(word, r1):
-    if word.endswith('eedly'):
-        if len(word) - 5 >= r1:
-            return word[:-3]
-        return word
-    if word.endswith('eed'):
-        if len(word) - 3 >= r1:
-            return word[:-1]
-        return word
+doubles = frozenset(['bb', 'dd', 'ff', 'gg', 'mm', 'nn', 'pp', 'rr', 'tt'])
 
-    def ends_with_double(word):
-        doubles = ['bb', 'dd', 'ff', 'gg', 'mm', 'nn', 'pp', 'rr', 'tt']
-        for double in doubles:
-            if word.endswith(double):
-                return True
-        return False
-
-    def step_1b_helper(word):
-        if word.endswith('at') or word.endswith('bl') or word.endswith('iz'):
-            return word + 'e'
-        if ends_with_double(word):
-            return word[:-1]
-        if is_short_word(word):
-            return word + 'e'
-        return word
+def step_1b_helper(word, r1):
+    if word.endswith(('at', 'bl', 'iz')):
+        return word + 'e'
+    if word[-2:] in doubles:
+        return word[:-1]
+    # the word is a prefix of the one r1 was computed for, so it is
+    # short when it ends in a short syllable and r1 lies past its end
+    if r1 >= len(word) and ends_with_short_syllable(word):
+        return word + 'e'
+    return word
 
-    suffixes = ['ed', 'edly', 'ing', 'ingly']
-    for suffix in suffixes:
-        if word.endswith(suffix):
-            preceding = word[:-len(suffix)]
-            if re.search(r"[aeiouy]", preceding):
-                return step_1b_helper(preceding)
+def step_1b(word, r1):
+    # every suffix ends in d, g or y, so the last letter picks the
+    # longest one that can match
+    last = word[-1:]
+    if last == 'd':
+        if word.endswith('eed'):
+            if len(word) - 3 >= r1:
+                return word[:-1]
+            return word
+        if not word.endswith('ed'):
+            return word
+        preceding = word[:-2]
+    elif last == 'g':
+        if not word.endswith('ing'):
+            return word
+        preceding = word[:-3]
+    elif last == 'y':
+        if word.endswith('eedly'):
+            if len(word) - 5 >= r1:
+                return word[:-3]
             return word
+        if word.endswith('edly'):
+            preceding = word[:-4]
+        elif word.endswith('ingly'):
+            preceding = word[:-5]
+        else:
+            return word
+    else:
+        return word
 
+    if not vowels.isdisjoint(preceding):
+        return step_1b_helper(preceding, r1)
     return word
 
 def step_1c(word):
     if word.endswith('y') or word.endswith('Y'):
-        if word[-2] not in 'aeiouy':
+        if word[-2] not in vowels:
             if len(word) > 2:
                 return word[:-1] + 'i'
     return word
 
-def step_2(word, r1):
-    def step_2_helper(end, repl, prev):
-        if word.endswith(end):
-            if len(word) - len(end) >= r1:
-                if prev == []:
-                    return word[:-len(end)] + repl
-                for p in prev:
-                    if word[:-len(end)].endswith(p):
-                        return word[:-len(end)] + repl
-            return word
-        return None
-
-    triples = [('ization', 'ize', []),
-               ('ational', 'ate', []),
-               ('fulness', 'ful', []),
-               ('ousness', 'ous', []),
-               ('iveness', 'ive', []),
-               ('tional', 'tion', []),
-               ('biliti', 'ble', []),
-               ('lessli', 'less', []),
-               ('entli', 'ent', []),
-               ('ation', 'ate', []),
-               ('alism', 'al', []),
-               ('aliti', 'al', []),
-               ('ousli', 'ous', []),
-               ('iviti', 'ive', []),
-               ('fulli', 'ful', []),
-               ('enci', 'ence', []),
-               ('anci', 'ance', []),
-               ('abli', 'able', []),
-               ('izer', 'ize', []),
-               ('ator', 'ate', []),
-               ('alli', 'al', []),
-               ('bli', 'ble', []),
-               ('ogi', 'og', ['l']),
-               ('li', '', ['c', 'd', 'e', 'g', 'h', 'k', 'm', 'n', 'r', 't'])]
-
-    for trip in triples:
-        attempt = step_2_helper(trip[0], trip[1], trip[2])
-        if attempt:
-            return attempt
+def make_suffix_trie(suffixes):
+    # each node maps a character to the next node, walking the suffixes
+    # backwards; the node ending a suffix holds it under the None key
+    trie = {}
+    for suffix in suffixes:
+        node = trie
+        for c in reversed(suffix):
+            node = node.setdefault(c, {})
+        node[None] = suffix
+    return trie
+
+def longest_suffix(word, trie):
+    suffix = None
+    node = trie
+    for i in range(len(word) - 1, -1, -1):
+        node = node.get(word[i])
+        if node is None:
+            break
+        suffix = node.get(None, suffix)
+    return suffix
+
+step_2_rules = {'ization': ('ize', ()),
+                'ational': ('ate', ()),
+                'fulness': ('ful', ()),
+                'ousness': ('ous', ()),
+                'iveness': ('ive', ()),
+                'tional': ('tion', ()),
+                'biliti': ('ble', ()),
+                'lessli': ('less', ()),
+                'entli': ('ent', ()),
+                'ation': ('ate', ()),
+                'alism': ('al', ()),
+                'aliti': ('al', ()),
+                'ousli': ('ous', ()),
+                'iviti': ('ive', ()),
+                'fulli': ('ful', ()),
+                'enci': ('ence', ()),
+                'anci': ('ance', ()),
+                'abli': ('able', ()),
+                'izer': ('ize', ()),
+                'ator': ('ate', ()),
+                'alli': ('al', ()),
+                'bli': ('ble', ()),
+                'ogi': ('og', ('l',)),
+                'li': ('', ('c', 'd', 'e', 'g', 'h', 'k', 'm', 'n', 'r', 't'))}
+step_2_trie = make_suffix_trie(step_2_rules)
 
+def step_2(word, r1):
+    # the root of the trie holds the last letter of every suffix
+    if word[-1:] not in step_2_trie:
+        return word
+    end = longest_suffix(word, step_2_trie)
+    if end:
+        repl, prev = step_2_rules[end]
+        stem = word[:-len(end)]
+        if len(stem) >= r1:
+            if not prev or stem[-1:] in prev:
+                return stem + repl
     return word
 
-def step_3(word, r1, r2):
-    def step_3_helper(end, repl, r2_necessary):
-        if word.endswith(end):
-            if len(word) - len(end) >= r1:
-                if not r2_necessary:
-                    return word[:-len(end)] + repl
-                else:
-                    if len(word) - len(end) >= r2:
-                        return word[:-len(end)] + repl
-            return word
-        return None
-
-    triples = [('ational', 'ate', False),
-               ('tional', 'tion', False),
-               ('alize', 'al', False),
-               ('icate', 'ic', False),
-               ('iciti', 'ic', False),
-               ('ative', '', True),
-               ('ical', 'ic', False),
-               ('ness', '', False),
-               ('ful', '', False)]
-
-    for trip in triples:
-        attempt = step_3_helper(trip[0], trip[1], trip[2])
-        if attempt:
-            return attempt
+step_3_rules = {'ational': ('ate', False),
+                'tional': ('tion', False),
+                'alize': ('al', False),
+                'icate': ('ic', False),
+                'iciti': ('ic', False),
+                'ative': ('', True),
+                'ical': ('ic', False),
+                'ness': ('', False),
+                'ful': ('', False)}
+step_3_trie = make_suffix_trie(step_3_rules)
 
+def step_3(word, r1, r2):
+    # the root of the trie holds the last letter of every suffix
+    if word[-1:] not in step_3_trie:
+        return word
+    end = longest_suffix(word, step_3_trie)
+    if end:
+        repl, r2_necessary = step_3_rules[end]
+        stem = word[:-len(end)]
+        if len(stem) >= r1:
+            if not r2_necessary or len(stem) >= r2:
+                return stem + repl
     return word
 
-def step_4(word, r2):
-    delete_list = ['al', 'ance', 'ence', 'er', 'ic', 'able', 'ible', 'ant', 'ement', 'ment', 'ent', 'ism', 'ate', 'iti', 'ous', 'ive', 'ize']
-
-    for end in delete_list:
-        if word.endswith(end):
-            if len(word) - len(end) >= r2:
-                return word[:-len(end)]
-            return word
-
-    if word.endswith('sion') or word.endswith('tion'):
-        if len(word) - 3 >= r2:
-            return word[:-3]
+step_4_rules = {'al': (),
+                'ance': (),
+                'ence': (),
+                'er': (),
+                'ic': (),
+                'able': (),
+                'ible': (),
+                'ant': (),
+                'ement': (),
+                'ment': (),
+                'ent': (),
+                'ism': (),
+                'ate': (),
+                'iti': (),
+                'ous': (),
+                'ive': (),
+                'ize': (),
+                'ion': ('s', 't')}
+step_4_trie = make_suffix_trie(step_4_rules)
 
+def step_4(word, r2):
+    # the root of the trie holds the last letter of every suffix
+    if word[-1:] not in step_4_trie:
+        return word
+    end = longest_suffix(word, step_4_trie)
+    if end:
+        prev = step_4_rules[end]
+        stem = word[:-len(end)]
+        if len(stem) >= r2:
+            if not prev or stem[-1:] in prev:
+                return stem
     return word
 
 def step_5(word, r1, r2):
-    if word.endswith('l'):
+    last = word[-1:]
+    if last == 'l':
         if len(word) - 1 >= r2 and word[-2] == 'l':
             return word[:-1]
         return word
 
-    if word.endswith('e'):
+    if last == 'e':
         if len(word) - 1 >= r2:
             return word[:-1]
-        if len(word) - 1 >= r1 and not ends_with_short_syllable(word[:-1]):
+        if len(word) - 1 >= r1 and not ends_with_short_syllable(word, len(word) - 1):
             return word[:-1]
 
     return word
@@ -263,7 +345,7 @@ exceptional_forms = {'skis': 'ski',
                     'bias': 'bias',
                     'andes': 'andes'}
 
-exceptional_early_exit_post_1a = ['inning', 'outing', 'canning', 'herring', 'earring', 'proceed', 'exceed', 'succeed']
+exceptional_early_exit_post_1a = frozenset(['inning', 'outing', 'canning', 'herring', 'earring', 'proceed', 'exceed', 'succeed'])
 
 def stem(word):
     """The main entry point in the old version of the API."""
@@ -296,12 +378,14 @@ class Stemmer:
     language codes.
     """
     max_cache_size = 10000
+    max_shared_stems = 50000
 
     def __init__ (self, algorithm, cache_size=None):
         if algorithm not in ['english', 'eng', 'en']:
             raise KeyError("Stemming algorithm '%s' not found" % algorithm)
         if cache_size:
             self.max_cache_size = cache_size
+        self.cache_clear()
 
     def stemWord(self, word):
         """Stem a word.
@@ -312,13 +396,60 @@ class Stemmer:
         The result is the stemmed form of the word. If the word supplied
         was a unicode object, the result will be a unicode object: if the
         word supplied was a string, the result will be a UTF-8 encoded string.
-        """
-        return Stemmer._stem(word)
 
-    def stemWords(self, words):
+        Results are kept in a least recently used cache of up to
+        max_cache_size words, so repeated words are only stemmed once.
+        Words that share a stem also share one result object, for up to
+        max_shared_stems distinct stems.
+        """
+        cache = self._cache
+        # on python 2 'x' == u'x', so the type is part of the key to keep
+        # a str result from being returned for unicode input
+        key = (type(word), word)
+        try:
+            # move the word to the most recently used end of the cache
+            stemmed = cache.pop(key)
+            self._hits += 1
+        except KeyError:
+            stemmed = self._share(self._stem(word))
+            self._misses += 1
+            if len(cache) >= self.max_cache_size:
+                cache.popitem(last=False)
+        cache[key] = stemmed
+        return stemmed
+
+    def cache_info(self):
+        """Get statistics about the word cache.
+
+        The result is a tuple of (hits, misses, max_cache_size, size).
+        """
+        return (self._hits, self._misses, self.max_cache_size, len(self._cache))
+
+    def cache_clear(self):
+        """Empty the word cache and reset its statistics."""
+        self._cache = OrderedDict()
+        self._stems = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def _share(self, stemmed):
+        # return the first equal stem seen, keyed by type so a python 2
+        # str is never handed out for unicode; the oldest stem is dropped
+        # once max_shared_stems are held
+        stems = self._stems
+        key = (type(stemmed), stemmed)
+        try:
+            return stems[key]
+        except KeyError:
+            if len(stems) >= self.max_shared_stems:
+                stems.popitem(last=False)
+            stems[key] = stemmed
+            return stemmed
+
+    def stemWords(self, words, processes=None):
         """Stem a list of words.
 
-        This takes a single argument, words, which must be a sequence,
+        This takes one required argument, words, which must be a sequence,
         iterator, generator or similar.
 
         The entries in words should either be UTF-8 encoded strings,
@@ -328,19 +459,65 @@ class Stemmer:
         supplied was a unicode object, the stemmed form will be a unicode
         object: if the word supplied was a string, the stemmed form will
         be a UTF-8 encoded string.
+
+        For large batches, processes may be given to stem the distinct
+        words that are not already cached in a pool of that many worker
+        processes. Each distinct word is only stemmed once, and its stem
+        is added to the cache.
         """
-        return [self.stemWord(word) for word in words]
+        if not processes or processes < 2:
+            # map looks stemWord up once and builds the list without a
+            # python-level loop
+            return list(map(self.stemWord, words))
+
+        words = list(words)
+        cache = self._cache
+        # keyed like the cache, so python 2 str and unicode stay apart
+        uncached = list(set([(type(word), word) for word in words
+                             if (type(word), word) not in cache]))
+        if not uncached:
+            return list(map(self.stemWord, words))
+
+        import multiprocessing
+        pool = multiprocessing.Pool(processes)
+        try:
+            stemmed_words = pool.map(_stem_word, [word for _, word in uncached])
+        finally:
+            pool.close()
+            pool.join()
+
+        stems = {}
+        for key, stemmed in zip(uncached, stemmed_words):
+            stemmed = self._share(stemmed)
+            stems[key] = stemmed
+            if len(cache) >= self.max_cache_size:
+                cache.popitem(last=False)
+            cache[key] = stemmed
+        self._misses += len(uncached)
+
+        stemmed_words = []
+        for word in words:
+            key = (type(word), word)
+            if key in stems:
+                stemmed_words.append(stems[key])
+            else:
+                stemmed_words.append(self.stemWord(word))
+        return stemmed_words
 
     @classmethod
     def _stem(cls, word):
-        was_unicode = False
+        # ascii unicode words are stemmed as they are, so the result is
+        # already unicode; other unicode words are returned unchanged
+        if isinstance(word, unicode) and not is_ascii(word):
+            return word
 
-        if isinstance(word, unicode):
-            was_unicode = True
+        if bytes is not str and isinstance(word, bytes):
+            # python 3 strings of bytes are stemmed as ascii text
             try:
-                word = word.encode('ascii')
-            except:
+                text = word.decode('ascii')
+            except UnicodeDecodeError:
                 return word
+            return cls._stem(text).encode('ascii')
 
         if len(word) <= 2:
             return word
@@ -350,9 +527,11 @@ class Stemmer:
         if word in exceptional_forms:
             return exceptional_forms[word]
 
-        word = capitalize_consonant_ys(word)
-        r1 = get_r1(word)
-        r2 = get_r2(word)
+        # consonant ys are marked as Y and restored at the end; words
+        # without a y have nothing to mark
+        if 'y' in word:
+            word = capitalize_consonant_ys(word)
+        r1, r2 = get_r1_r2(word)
         word = step_0(word)
         word = step_1a(word)
 
@@ -366,12 +545,15 @@ class Stemmer:
         word = step_3(word, r1, r2)
         word = step_4(word, r2)
         word = step_5(word, r1, r2)
-        word = normalize_ys(word)
-
-        if was_unicode:
-            return word.decode('utf-8')
+        # checked separately, since the input may have had a Y of its own
+        if 'Y' in word:
+            word = normalize_ys(word)
         return word
 
+def _stem_word(word):
+    # module level so that worker processes can unpickle it
+    return Stemmer._stem(word)
+
 class TestPorter2(unittest.TestCase):
     def setUp(self):
         pass
@@ -385,6 +567,83 @@ class TestPorter2(unittest.TestCase):
         stemmer = Stemmer('en')
         stemmer = Stemmer('eng')
 
+    def testCache(self):
+        stemmer = Stemmer('english', 2)
+        self.assertEqual(stemmer.cache_info(), (0, 0, 2, 0))
+        self.assertEqual(stemmer.stemWord('consigned'), 'consign')
+        self.assertEqual(stemmer.stemWord('consigned'), 'consign')
+        self.assertEqual(stemmer.cache_info(), (1, 1, 2, 1))
+        stemmer.stemWord('consisted')
+        stemmer.stemWord('consigned')
+        stemmer.stemWord('consists')
+        self.assertEqual(stemmer.cache_info(), (2, 3, 2, 2))
+
+        # consisted was the least recently used, so it was evicted
+        self.assertEqual(stemmer.stemWord('consisted'), 'consist')
+        self.assertEqual(stemmer.cache_info(), (2, 4, 2, 2))
+
+        stemmer.cache_clear()
+        self.assertEqual(stemmer.cache_info(), (0, 0, 2, 0))
+
+    def testCacheMixedTypes(self):
+        # on python 2 b'consigned' == u'consigned' and they hash the same
+        stemmer = Stemmer('english')
+        stemmed = stemmer.stemWord(b'consigned')
+        self.assertEqual(stemmed, b'consign')
+        self.assertTrue(type(stemmed) is bytes)
+        stemmed = stemmer.stemWord(u'consigned')
+        self.assertEqual(stemmed, u'consign')
+        self.assertTrue(type(stemmed) is unicode)
+        stemmed = stemmer.stemWord(b'consigned')
+        self.assertTrue(type(stemmed) is bytes)
+        self.assertEqual(stemmer.cache_info(), (1, 2, stemmer.max_cache_size, 2))
+
+    def testSharedStems(self):
+        stemmer = Stemmer('english')
+        self.assertTrue(stemmer.stemWord('consigned') is stemmer.stemWord('consigning'))
+        self.assertTrue(stemmer.stemWord('consist') is stemmer.stemWord('consists'))
+
+        # stems are only shared between words of the same type
+        stemmed = stemmer.stemWord(b'consigned')
+        self.assertTrue(type(stemmer.stemWord(u'consigning')) is unicode)
+        self.assertTrue(stemmer.stemWord(b'consigning') is stemmed)
+
+        # the oldest stem is dropped once the table is full
+        stemmer = Stemmer('english')
+        stemmer.max_shared_stems = 1
+        stemmed = stemmer.stemWord('consigned')
+        stemmer.stemWord('consisted')
+        self.assertTrue(stemmer.stemWord('consigning') is not stemmed)
+
+    def testStemWords(self):
+        stemmer = Stemmer('english')
+        self.assertEqual(stemmer.stemWords([]), [])
+        self.assertEqual(stemmer.stemWords(['consigned', 'skies', 'consigned']),
+                         ['consign', 'sky', 'consign'])
+        self.assertEqual(stemmer.stemWords(iter(['consisted'])), ['consist'])
+        self.assertEqual(stemmer.cache_info(), (1, 3, stemmer.max_cache_size, 3))
+
+    def testStemWordsProcesses(self):
+        stemmer = Stemmer('english')
+        self.assertEqual(stemmer.stemWords([], processes=2), [])
+        stemmer.stemWord('skies')
+        words = ['consigned', 'skies', 'consigned', 'consisting']
+        self.assertEqual(stemmer.stemWords(iter(words), processes=2),
+                         ['consign', 'sky', 'consign', 'consist'])
+
+        # each distinct uncached word is a miss, and is cached afterwards
+        self.assertEqual(stemmer.cache_info(), (1, 3, stemmer.max_cache_size, 3))
+
+        # a fully cached batch is answered from the cache alone
+        self.assertEqual(stemmer.stemWords(words, processes=2),
+                         ['consign', 'sky', 'consign', 'consist'])
+        self.assertEqual(stemmer.cache_info(), (5, 3, stemmer.max_cache_size, 3))
+
+        # python 2 str and unicode words are stemmed separately
+        stemmed_words = stemmer.stemWords([b'consists', u'consists'], processes=2)
+        self.assertEqual([type(stemmed) for stemmed in stemmed_words], [bytes, unicode])
+        self.assertEqual(stemmer.cache_info(), (5, 5, stemmer.max_cache_size, 5))
+
     def testDeprecation(self):
         self.assertRaises(DeprecationWarning, stem, 'stemming')
 
@@ -420,6 +679,14 @@ class TestPorter2(unittest.TestCase):
         self.assertEqual(get_r2('sprinkled'), 9)
         self.assertEqual(get_r2('eucharist'), 6)
 
+    def testGetR1R2(self):
+        self.assertEqual(get_r1_r2(''), (0, 0))
+        self.assertEqual(get_r1_r2('beautiful'), (5, 7))
+        self.assertEqual(get_r1_r2('beau'), (4, 4))
+        self.assertEqual(get_r1_r2('animadversion'), (2, 4))
+        self.assertEqual(get_r1_r2('generous'), (5, 8))
+        self.assertEqual(get_r1_r2('communist'), (6, 8))
+
     def testEndsWithShortSyllable(self):
         self.assertEqual(ends_with_short_syllable(''), False)
         self.assertEqual(ends_with_short_syllable('rap'), True)
@@ -431,6 +698,12 @@ class TestPorter2(unittest.TestCase):
         self.assertEqual(ends_with_short_syllable('uproot'), False)
         self.assertEqual(ends_with_short_syllable('bestow'), False)
         self.assertEqual(ends_with_short_syllable('disturb'), False)
+        self.assertEqual(ends_with_short_syllable('ax'), True)
+        self.assertEqual(ends_with_short_syllable('tax'), False)
+        self.assertEqual(ends_with_short_syllable('saY'), False)
+        self.assertEqual(ends_with_short_syllable('rape', 3), True)
+        self.assertEqual(ends_with_short_syllable('one', 2), True)
+        self.assertEqual(ends_with_short_syllable('bestowe', 6), False)
 
     def testIsShortWord(self):
         self.assertEqual(is_short_word(''), False)
@@ -458,6 +731,7 @@ class TestPorter2(unittest.TestCase):
         self.assertEqual(capitalize_consonant_ys('flying'), 'flying')
         self.assertEqual(capitalize_consonant_ys('syzygy'), 'syzygy')
         self.assertEqual(capitalize_consonant_ys('sayyid'), 'saYyid')
+        self.assertEqual(capitalize_consonant_ys('yayyy'), 'YaYyY')
 
     def testStep0(self):
         self.assertEqual(step_0(''), '')
@@ -465,6 +739,8 @@ class TestPorter2(unittest.TestCase):
         self.assertEqual(step_0('dog\'s'), 'dog')
         self.assertEqual(step_0('dog\'s\''), 'dog')
         self.assertEqual(step_0('dog\''), 'dog')
+        self.assertEqual(step_0('dogs'), 'dogs')
+        self.assertEqual(step_0('\''), '')
 
     def testStep1a(self):
         self.assertEqual(step_1a(''), '')
@@ -483,6 +759,9 @@ class TestPorter2(unittest.TestCase):
         self.assertEqual(step_1a('mikeus'), 'mikeus')
         self.assertEqual(step_1a('mikess'), 'mikess')
         self.assertEqual(step_1a('truss'), 'truss')
+        self.assertEqual(step_1a('s'), 's')
+        self.assertEqual(step_1a('ies'), 'ie')
+        self.assertEqual(step_1a('bed'), 'bed')
 
     def testStep1b(self):
         self.assertEqual(step_1b('', 0), '')
@@ -513,11 +792,12 @@ class TestPorter2(unittest.TestCase):
         self.assertEqual(step_1b('torred', 0), 'tor')
         self.assertEqual(step_1b('catted', 0), 'cat')
         self.assertEqual(step_1b('exazzedly', 0), 'exazz')
-        self.assertEqual(step_1b('hoped', 0), 'hope')
-        self.assertEqual(step_1b('hopedly', 0), 'hope')
-        self.assertEqual(step_1b('hoping', 0), 'hope')
-        self.assertEqual(step_1b('hopingly', 0), 'hope')
-        self.assertEqual(step_1b('coped', 0), 'cope')
+        self.assertEqual(step_1b('hoped', 3), 'hope')
+        self.assertEqual(step_1b('hopedly', 3), 'hope')
+        self.assertEqual(step_1b('hoping', 3), 'hope')
+        self.assertEqual(step_1b('hopingly', 3), 'hope')
+        self.assertEqual(step_1b('coped', 3), 'cope')
+        self.assertEqual(step_1b('coped', 2), 'cop')
 
     def testStep1c(self):
         self.assertEqual(step_1c(''), '')
@@ -528,6 +808,18 @@ class TestPorter2(unittest.TestCase):
         self.assertEqual(step_1c('bY'), 'bY')
         self.assertEqual(step_1c('saY'), 'saY')
 
+    def testLongestSuffix(self):
+        trie = make_suffix_trie(['li', 'alli', 'ation', 'ization'])
+        self.assertEqual(longest_suffix('', trie), None)
+        self.assertEqual(longest_suffix('mike', trie), None)
+        self.assertEqual(longest_suffix('li', trie), 'li')
+        self.assertEqual(longest_suffix('openli', trie), 'li')
+        self.assertEqual(longest_suffix('rationalli', trie), 'alli')
+        self.assertEqual(longest_suffix('ation', trie), 'ation')
+        self.assertEqual(longest_suffix('kaization', trie), 'ization')
+        self.assertEqual(longest_suffix('lization', trie), 'ization')
+        self.assertEqual(longest_suffix('zation', trie), 'ation')
+
     def testStep2(self):
         self.assertEqual(step_2('', 0), '')
         self.assertEqual(step_2('mike', 0), 'mike')
@@ -654,6 +946,10 @@ class TestPorter2(unittest.TestCase):
         self.assertEqual(step_4('hive', 3), 'hive')
         self.assertEqual(step_4('ize', 0), '')
         self.assertEqual(step_4('ize', 1), 'ize')
+        self.assertEqual(step_4('mission', 4), 'miss')
+        self.assertEqual(step_4('mission', 5), 'mission')
+        self.assertEqual(step_4('motion', 3), 'mot')
+        self.assertEqual(step_4('onion', 0), 'onion')
 
     def testStep5(self):
         self.assertEqual(step_5('mik', 0, 0), 'mik')
@@ -719,21 +1015,30 @@ class TestPorter2(unittest.TestCase):
         self.assertEqual(stemmer.stemWord('exceeding'), 'exceed')
         self.assertEqual(stemmer.stemWord('succeeds'), 'succeed')
 
+        # capital ys are lowercased
+        self.assertEqual(stemmer.stemWord('Yes'), 'yes')
+        self.assertEqual(stemmer.stemWord('Yards'), 'yard')
+        self.assertEqual(stemmer.stemWord('YORK'), 'yORK')
+
+        # unicode
+        self.assertEqual(stemmer.stemWord(u'generously'), u'generous')
+        self.assertTrue(isinstance(stemmer.stemWord(u'generously'), unicode))
+
+        # strings of bytes
+        self.assertEqual(stemmer.stemWord(b'consisted'), b'consist')
+
         # Non-ascii
         self.assertEqual(stemmer.stemWord(u'czy\u017ce'), u'czy\u017ce')
         self.assertEqual(stemmer.stemWord(u'eug\xe8neysa\xffe'), u'eug\xe8neysa\xffe')
 
+    def testVocabulary(self):
         # hardcore test
-        infile = open('./voc.txt', 'r')
-        outfile = open('./stemmedvoc.txt', 'r')
-        while True:
-            word = infile.readline()
-            output = outfile.readline()
-            if word == '':
-                break
-            word = word[:-1]
-            output = output[:-1]
-            self.assertEqual(stemmer.stemWord(word), output)
+        stemmer = Stemmer('english')
+        with open('./voc.txt', 'r') as infile:
+            words = infile.read().splitlines()
+        with open('./stemmedvoc.txt', 'r') as outfile:
+            outputs = outfile.read().splitlines()
+        self.assertEqual(stemmer.stemWords(words), outputs)
 
 if __name__ == '__main__':
     unittest.main()